@@ -4,213 +4,123 @@ Pytest configuration and shared fixtures for the RAG system tests.
 This module provides common fixtures for mocking dependencies and setting up
 test data across all test modules.
 """
+import gc
+import numpy as np
 import pytest
-import tempfile
-import shutil
-import os
-from unittest.mock import MagicMock, patch
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from dataclasses import dataclass, replace
+from unittest.mock import create_autospec, patch
 from fastapi.testclient import TestClient
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 
 from config import config
 from rag_system import RAGSystem
-from models import Course, Lesson
+from session_manager import SessionManager
 
 
-class MockConfig:
-    """Mock configuration for testing that mirrors the real config structure"""
-    def __init__(self):
-        self.CHUNK_SIZE = 1000
-        self.CHUNK_OVERLAP = 100
-        self.CHROMA_PATH = "test_chroma"
-        self.EMBEDDING_MODEL = "all-MiniLM-L6-v2"
-        self.MAX_RESULTS = 5
-        self.ANTHROPIC_API_KEY = "test_key"
-        self.ANTHROPIC_MODEL = "claude-3-sonnet-20241022"
-        self.MAX_HISTORY = 10
-
-
-@pytest.fixture
-def mock_config():
-    """Provide a mock configuration for testing"""
-    return MockConfig()
-
-
-@pytest.fixture
-def temp_directory():
-    """Create a temporary directory for test isolation"""
-    temp_dir = tempfile.mkdtemp()
-    yield temp_dir
-    shutil.rmtree(temp_dir, ignore_errors=True)
-
-
-@pytest.fixture
-def isolated_config(temp_directory):
-    """Provide an isolated config that doesn't interfere with real data"""
-    original_chroma_path = config.CHROMA_PATH
-    original_api_key = config.ANTHROPIC_API_KEY
+class _StubEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Deterministic stand-in for the sentence-transformer embedder (no model download, no torch)"""
+    def __init__(self, model_name=None, **kwargs):
+        pass
     
-    # Temporarily modify config for testing
-    config.CHROMA_PATH = os.path.join(temp_directory, "test_chroma")
-    config.ANTHROPIC_API_KEY = "test-key-12345"
-    
-    yield config
-    
-    # Restore original values
-    config.CHROMA_PATH = original_chroma_path
-    config.ANTHROPIC_API_KEY = original_api_key
+    def __call__(self, input: Documents) -> Embeddings:
+        return [np.zeros(8, dtype=np.float32) for _ in input]
 
 
-@pytest.fixture
-def sample_course():
-    """Create a sample course object for testing"""
-    lessons = [
-        Lesson(
-            title="Introduction to AI",
-            content="Artificial Intelligence is the simulation of human intelligence...",
-            video_url="https://example.com/video1",
-            duration="15:30"
-        ),
-        Lesson(
-            title="Machine Learning Basics",
-            content="Machine learning is a subset of AI that enables systems to learn...",
-            video_url="https://example.com/video2",
-            duration="22:15"
-        )
-    ]
-    
-    return Course(
-        title="Fundamentals of AI",
-        instructor="Dr. Jane Smith",
-        course_link="https://example.com/course",
-        lessons=lessons
-    )
-
-
-@pytest.fixture
-def sample_courses_list(sample_course):
-    """Create a list of sample courses for testing"""
-    course2 = Course(
-        title="Advanced Machine Learning",
-        instructor="Prof. John Doe",
-        course_link="https://example.com/course2",
-        lessons=[
-            Lesson(
-                title="Neural Networks",
-                content="Neural networks are computing systems inspired by biological neural networks...",
-                video_url="https://example.com/video3",
-                duration="30:45"
-            )
-        ]
-    )
-    
-    return [sample_course, course2]
-
+@pytest.fixture(scope="session", autouse=True)
+def _stub_embedding_model():
+    """Keep any real VectorStore from loading the sentence-transformer model"""
+    with patch(
+        'chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction',
+        _StubEmbeddingFunction
+    ):
+        yield
 
-@pytest.fixture
-def mock_document_processor():
-    """Mock DocumentProcessor for testing"""
-    with patch('rag_system.DocumentProcessor') as mock_processor:
-        mock_instance = MagicMock()
-        mock_processor.return_value = mock_instance
-        yield mock_instance
-
-
-@pytest.fixture
-def mock_vector_store():
-    """Mock VectorStore for testing"""
-    with patch('rag_system.VectorStore') as mock_store:
-        mock_instance = MagicMock()
-        mock_store.return_value = mock_instance
-        
-        # Default mock behaviors
-        mock_instance.get_existing_course_titles.return_value = []
-        mock_instance.get_course_count.return_value = 0
-        
-        yield mock_instance
 
-
-@pytest.fixture
-def mock_ai_generator():
-    """Mock AIGenerator for testing"""
-    with patch('rag_system.AIGenerator') as mock_generator:
-        mock_instance = MagicMock()
-        mock_generator.return_value = mock_instance
-        
-        # Default mock behavior
-        mock_instance.generate_response.return_value = "Mocked AI response"
-        
-        yield mock_instance
+@dataclass(frozen=True, slots=True)
+class MockConfig:
+    """Mock configuration for testing that mirrors the real config structure"""
+    CHUNK_SIZE: int = 1000
+    CHUNK_OVERLAP: int = 100
+    CHROMA_PATH: str = "test_chroma"
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    MAX_RESULTS: int = 5
+    ANTHROPIC_API_KEY: str = "test_key"
+    ANTHROPIC_MODEL: str = "claude-3-sonnet-20241022"
+    MAX_HISTORY: int = 10
 
 
-@pytest.fixture
-def mock_session_manager():
-    """Mock SessionManager for testing"""
-    with patch('rag_system.SessionManager') as mock_manager:
-        mock_instance = MagicMock()
-        mock_manager.return_value = mock_instance
-        
-        # Default mock behaviors
-        mock_instance.create_session.return_value = "test_session_123"
-        mock_instance.get_conversation_history.return_value = None
-        
-        yield mock_instance
+# Immutable, so a single instance is shared by every test
+_DEFAULT_MOCK_CONFIG = MockConfig()
 
 
-@pytest.fixture
-def mock_tool_manager():
-    """Mock ToolManager for testing"""
-    with patch('rag_system.ToolManager') as mock_manager:
-        mock_instance = MagicMock()
-        mock_manager.return_value = mock_instance
-        
-        # Default mock behaviors
-        mock_instance.get_tool_definitions.return_value = []
-        mock_instance.get_last_sources.return_value = []
-        
-        yield mock_instance
+@pytest.fixture(scope="session")
+def mock_config():
+    """Provide a mock configuration for testing"""
+    return _DEFAULT_MOCK_CONFIG
 
 
 @pytest.fixture
-def mock_rag_system(
-    mock_config,
-    mock_document_processor,
-    mock_vector_store,
-    mock_ai_generator,
-    mock_session_manager,
-    mock_tool_manager
-):
-    """Create a fully mocked RAG system for testing"""
-    with patch('rag_system.CourseSearchTool'), patch('rag_system.CourseOutlineTool'):
-        rag_system = RAGSystem(mock_config)
-        return rag_system
+def isolated_config(tmp_path):
+    """Provide a copy of the config that doesn't interfere with real data"""
+    # A copy rather than in-place edits, so tests never share the global config
+    return replace(
+        config,
+        CHROMA_PATH=str(tmp_path / "chroma"),
+        ANTHROPIC_API_KEY="test-key-12345"
+    )
 
 
-@pytest.fixture
-def test_app():
+# Default behaviors of the RAG system mock behind the test app's endpoints
+_RAG_MOCK_DEFAULTS = {
+    "query.return_value": ("Test response", [{"text": "Test source", "url": None}]),
+    "get_course_analytics.return_value": {
+        "total_courses": 2,
+        "course_titles": ["Course 1", "Course 2"]
+    },
+    "session_manager.create_session.return_value": "test_session_123",
+}
+
+
+@pytest.fixture(scope="session")
+def _rag_mock_prototype():
+    """Spec'd RAG system mock, built once and handed to tests through mock_rag"""
+    prototype = create_autospec(RAGSystem, instance=True)
+    # session_manager is set in RAGSystem.__init__, so the class spec doesn't carry it
+    prototype.session_manager = create_autospec(SessionManager, instance=True)
+    prototype.configure_mock(**_RAG_MOCK_DEFAULTS)
+    return prototype
+
+
+@pytest.fixture(scope="session")
+def _app_module():
+    """Import the app module once, on first use by the API tests"""
+    # RAGSystem is patched so the import does not build a real RAG system (ChromaDB
+    # client + embedding model), and the app's DEBUG logging setup so it does not
+    # create app.log in the working directory
+    with (
+        patch('rag_system.RAGSystem'),
+        patch('logging.basicConfig'),
+        patch('logging.FileHandler'),
+    ):
+        import app
+    return app
+
+
+@pytest.fixture(scope="session")
+def test_app(_rag_mock_prototype, _app_module):
     """Create a test FastAPI app with minimal dependencies"""
+    from app import QueryRequest, QueryResponse, CourseStats, SourceItem
+    
     app = FastAPI(title="Test RAG System")
     
-    # Mock the RAG system to avoid initialization issues
-    with patch('app.rag_system') as mock_rag:
-        mock_instance = MagicMock()
-        mock_rag.return_value = mock_instance
-        
-        # Default mock behaviors for API endpoints
-        mock_instance.query.return_value = ("Test response", [{"text": "Test source", "url": None}])
-        mock_instance.get_course_analytics.return_value = {
-            "total_courses": 2,
-            "course_titles": ["Course 1", "Course 2"]
-        }
-        mock_instance.session_manager.create_session.return_value = "test_session_123"
-        
-        # Import and configure the endpoints
-        from app import QueryRequest, QueryResponse, CourseStats, SourceItem
-        
-        @app.post("/api/query", response_model=QueryResponse)
-        async def query_documents(request: QueryRequest):
-            session_id = request.session_id or mock_instance.session_manager.create_session()
-            answer, sources = mock_instance.query(request.query, session_id)
+    # Endpoints look up app.rag_system per request, as the real app's endpoints do
+    @app.post("/api/query", response_model=QueryResponse)
+    async def query_documents(request: QueryRequest):
+        rag_system = _app_module.rag_system
+        try:
+            session_id = request.session_id or rag_system.session_manager.create_session()
+            answer, sources = rag_system.query(request.query, session_id)
             
             formatted_sources = []
             for source in sources:
@@ -224,28 +134,57 @@ def test_app():
                 sources=formatted_sources,
                 session_id=session_id
             )
-        
-        @app.get("/api/courses", response_model=CourseStats)
-        async def get_course_stats():
-            analytics = mock_instance.get_course_analytics()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    @app.get("/api/courses", response_model=CourseStats)
+    async def get_course_stats():
+        try:
+            analytics = _app_module.rag_system.get_course_analytics()
             return CourseStats(
                 total_courses=analytics["total_courses"],
                 course_titles=analytics["course_titles"]
             )
-        
-        @app.get("/")
-        async def root():
-            return {"message": "RAG System API", "status": "running"}
-        
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    @app.get("/")
+    async def root():
+        return {"message": "RAG System API", "status": "running"}
+    
+    # Mock the RAG system to avoid initialization issues; kept in place for the session
+    with pytest.MonkeyPatch.context() as session_monkeypatch:
+        session_monkeypatch.setattr(_app_module, "rag_system", _rag_mock_prototype)
         yield app
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def test_client(test_app):
     """Create a test client for the FastAPI application"""
     return TestClient(test_app)
 
 
+@pytest.fixture(autouse=True)
+def _reset_rag_mock(request):
+    """Restore the RAG system mock to its defaults so customizations don't leak"""
+    if "_rag_mock_prototype" in request.fixturenames:
+        prototype = request.getfixturevalue("_rag_mock_prototype")
+        prototype.reset_mock(return_value=True, side_effect=True)
+        prototype.configure_mock(**_RAG_MOCK_DEFAULTS)
+    yield
+
+
+@pytest.fixture
+def mock_rag(request, _rag_mock_prototype, test_app):
+    """The RAG system mock installed as app.rag_system, configured for one test
+    
+    Indirect parametrization passes a configure_mock dict of per-test behaviors;
+    _reset_rag_mock restores the defaults before the next test.
+    """
+    _rag_mock_prototype.configure_mock(**getattr(request, "param", {}))
+    return _rag_mock_prototype
+
+
 @pytest.fixture
 def sample_query_request():
     """Sample query request data for API testing"""
@@ -263,16 +202,6 @@ def sample_query_request_no_session():
     }
 
 
-@pytest.fixture
-def expected_query_response():
-    """Expected response format for query API"""
-    return {
-        "answer": "Test response",
-        "sources": [{"text": "Test source", "url": None}],
-        "session_id": "test_session_123"
-    }
-
-
 @pytest.fixture
 def expected_course_stats():
     """Expected response format for course stats API"""
@@ -282,38 +211,26 @@ def expected_course_stats():
     }
 
 
-# Utility fixture for error simulation
-@pytest.fixture
-def simulate_error():
-    """Utility fixture to help simulate various error conditions"""
-    def _simulate(error_type, message="Test error"):
-        if error_type == "api_error":
-            return Exception(f"API Error: {message}")
-        elif error_type == "database_error":
-            return Exception(f"Database Error: {message}")
-        elif error_type == "validation_error":
-            return ValueError(f"Validation Error: {message}")
-        else:
-            return Exception(message)
-    
-    return _simulate
+@pytest.fixture(scope="session")
+def large_course_list():
+    """Course titles for large dataset API tests"""
+    return [f"Course {i}" for i in range(100)]
 
 
-# Auto-use fixtures for test isolation
 @pytest.fixture(autouse=True)
-def isolate_warnings():
-    """Automatically suppress warnings during tests"""
-    import warnings
-    warnings.filterwarnings("ignore", message="resource_tracker: There appear to be.*")
-
-
-# Markers for different test categories
-pytest_plugins = []
-
-
-def pytest_configure(config):
-    """Configure pytest markers"""
-    config.addinivalue_line("markers", "unit: Unit tests for individual components")
-    config.addinivalue_line("markers", "integration: Integration tests for system workflows") 
-    config.addinivalue_line("markers", "api: API endpoint tests")
-    config.addinivalue_line("markers", "slow: Tests that take longer to run")
\ No newline at end of file
+def _no_gc(request):
+    """Pause the cyclic garbage collector while a test body runs
+    
+    Mock-heavy tests build large cyclic MagicMock graphs; collecting them
+    mid-test only adds pauses. The collector is re-enabled between tests.
+    Benchmarks keep it running so their timings reflect normal operation.
+    """
+    if "benchmark" in request.fixturenames:
+        yield
+        return
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.collect(0)
+        gc.enable()
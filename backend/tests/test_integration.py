@@ -3,206 +3,140 @@ Integration tests to reproduce the actual "query failed" error
 """
 import pytest
 import os
-import tempfile
 import shutil
-from unittest.mock import patch, MagicMock
+from dataclasses import replace
+from unittest.mock import patch
+from chromadb.errors import ChromaError
 from rag_system import RAGSystem
+from vector_store import SearchResults
 from config import config
 
 
+@pytest.fixture(scope="session")
+def rag_system_shared(tmp_path_factory):
+    """One RAG system over an empty ChromaDB store, shared by tests that don't add data"""
+    shared_config = replace(
+        config,
+        CHROMA_PATH=str(tmp_path_factory.mktemp("shared_chroma")),
+        ANTHROPIC_API_KEY="test-key-12345"
+    )
+    return RAGSystem(shared_config)
+
+
+@pytest.fixture(scope="session")
+def _chroma_template(tmp_path_factory):
+    """Empty ChromaDB store initialized once; tests get their own copy of it"""
+    template_path = tmp_path_factory.mktemp("chroma_template") / "db"
+    RAGSystem(replace(config, CHROMA_PATH=str(template_path), ANTHROPIC_API_KEY="test-key-12345"))
+    return template_path
+
+
+@pytest.fixture
+def isolated_config(isolated_config, _chroma_template):
+    """Config copy backed by this test's own copy of the template ChromaDB store"""
+    shutil.copytree(_chroma_template, isolated_config.CHROMA_PATH)
+    return isolated_config
+
+
 class TestIntegration:
     """Integration tests to reproduce real-world issues"""
     
-    def setup_method(self):
-        """Setup test environment"""
-        # Create a temporary directory for testing
-        self.temp_dir = tempfile.mkdtemp()
-        self.original_chroma_path = config.CHROMA_PATH
-        config.CHROMA_PATH = os.path.join(self.temp_dir, "test_chroma")
-        
-        # Mock API key to avoid real API calls
-        config.ANTHROPIC_API_KEY = "test-key-12345"
-        
-    def teardown_method(self):
-        """Cleanup test environment"""
-        # Restore original config
-        config.CHROMA_PATH = self.original_chroma_path
-        # Clean up temp directory
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
-    
-    def test_rag_system_initialization_real_config(self):
+    @pytest.mark.slow
+    def test_rag_system_initialization_real_config(self, isolated_config):
         """Test RAG system initialization with real configuration"""
-        try:
-            rag_system = RAGSystem(config)
-            assert rag_system is not None
-            assert rag_system.vector_store is not None
-            assert rag_system.ai_generator is not None
-            assert rag_system.tool_manager is not None
-            print("✓ RAG System initialization successful")
-        except Exception as e:
-            pytest.fail(f"RAG System initialization failed: {e}")
+        rag_system = RAGSystem(isolated_config)
+        
+        assert rag_system.vector_store is not None
+        assert rag_system.ai_generator is not None
+        assert rag_system.tool_manager is not None
     
-    def test_query_without_documents(self):
+    def test_query_without_documents(self, rag_system_shared, monkeypatch):
         """Test query on empty system - should handle gracefully"""
-        try:
-            rag_system = RAGSystem(config)
-            
-            # Mock the AI generator to avoid real API calls
-            with patch.object(rag_system.ai_generator, 'generate_response') as mock_generate:
-                mock_generate.return_value = "I don't have any course content available."
-                
-                response, sources = rag_system.query("What is machine learning?")
-                
-                assert response is not None
-                assert isinstance(sources, list)
-                print("✓ Query on empty system handled gracefully")
-                
-        except Exception as e:
-            print(f"✗ Query failed with error: {e}")
-            # This might be the source of your "query failed" error
-            assert False, f"Query should not fail completely: {e}"
+        # Mock the AI generator to avoid real API calls
+        monkeypatch.setattr(
+            rag_system_shared.ai_generator, "generate_response",
+            lambda *args, **kwargs: "I don't have any course content available."
+        )
+        
+        response, sources = rag_system_shared.query("What is machine learning?")
+        
+        assert response is not None
+        assert isinstance(sources, list)
     
-    def test_document_loading_failure(self):
+    def test_document_loading_failure(self, rag_system_shared):
         """Test handling of document loading failures"""
-        try:
-            rag_system = RAGSystem(config)
-            
-            # Try to load from a non-existent directory
-            courses, chunks = rag_system.add_course_folder("nonexistent_directory")
-            
-            assert courses == 0
-            assert chunks == 0
-            print("✓ Non-existent directory handled gracefully")
-            
-        except Exception as e:
-            print(f"✗ Document loading failure not handled: {e}")
-            assert False, f"Document loading should handle missing directories: {e}"
+        # Try to load from a non-existent directory
+        courses, chunks = rag_system_shared.add_course_folder("nonexistent_directory")
+        
+        assert courses == 0
+        assert chunks == 0
     
-    def test_vector_search_with_no_data(self):
+    def test_vector_search_with_no_data(self, rag_system_shared):
         """Test vector search when no data is loaded"""
-        try:
-            rag_system = RAGSystem(config)
-            
-            # Access the search tool directly
-            search_tool = rag_system.search_tool
-            result = search_tool.execute("test query")
-            
-            assert "No relevant content found" in result
-            print("✓ Empty search handled gracefully")
-            
-        except Exception as e:
-            print(f"✗ Vector search failed: {e}")
-            assert False, f"Vector search should handle empty data: {e}"
+        # Access the search tool directly
+        search_tool = rag_system_shared.search_tool
+        result = search_tool.execute("test query")
+        
+        assert "No relevant content found" in result
     
-    def test_anthropic_api_key_validation(self):
+    @pytest.mark.slow
+    def test_anthropic_api_key_validation(self, isolated_config):
         """Test handling of missing or invalid API key"""
-        # Temporarily clear the API key
-        original_key = config.ANTHROPIC_API_KEY
-        config.ANTHROPIC_API_KEY = ""
+        # Clear the API key for this test only
+        rag_system = RAGSystem(replace(isolated_config, ANTHROPIC_API_KEY=""))
         
-        try:
-            rag_system = RAGSystem(config)
-            
-            # This might throw an error if API key validation is strict
-            with patch.object(rag_system.ai_generator, 'generate_response') as mock_generate:
-                mock_generate.side_effect = Exception("API key invalid")
-                
-                with pytest.raises(Exception, match="API key invalid"):
-                    rag_system.query("test query")
-                    
-            print("✓ API key validation works as expected")
+        # This might throw an error if API key validation is strict
+        with patch.object(rag_system.ai_generator, 'generate_response') as mock_generate:
+            mock_generate.side_effect = Exception("API key invalid")
             
-        except Exception as e:
-            print(f"✗ API key handling issue: {e}")
-            
-        finally:
-            # Restore API key
-            config.ANTHROPIC_API_KEY = original_key
+            with pytest.raises(Exception, match="API key invalid"):
+                rag_system.query("test query")
     
-    def test_chroma_db_initialization_failure(self):
+    @pytest.mark.slow
+    def test_chroma_db_initialization_failure(self, isolated_config, tmp_path):
         """Test handling of ChromaDB initialization issues"""
-        # Use an invalid path to trigger ChromaDB errors
-        config.CHROMA_PATH = "/invalid/path/that/cannot/be/created"
-        
-        try:
-            # This should potentially fail
-            rag_system = RAGSystem(config)
-            
-            # If it doesn't fail during init, it might fail during search
-            search_tool = rag_system.search_tool
-            result = search_tool.execute("test query")
-            
-            print(f"ChromaDB result with invalid path: {result}")
-            
-        except Exception as e:
-            print(f"✓ ChromaDB initialization failed as expected: {e}")
-            # This is actually expected behavior
+        # Nest the store under a regular file so the path can't be created, even as root
+        not_a_dir = tmp_path / "not_a_dir"
+        not_a_dir.touch()
         
-        finally:
-            # Reset to valid path
-            config.CHROMA_PATH = os.path.join(self.temp_dir, "test_chroma")
+        with pytest.raises(ChromaError):
+            RAGSystem(replace(isolated_config, CHROMA_PATH=str(not_a_dir / "chroma")))
     
-    def test_tool_execution_error_propagation(self):
+    def test_tool_execution_error_propagation(self, rag_system_shared, monkeypatch):
         """Test how tool execution errors propagate to query responses"""
-        try:
-            rag_system = RAGSystem(config)
-            
-            # Mock the vector store to return an error
-            with patch.object(rag_system.vector_store, 'search') as mock_search:
-                from vector_store import SearchResults
-                mock_search.return_value = SearchResults.empty("Database connection failed")
-                
-                # Mock AI generator to simulate tool usage
-                with patch.object(rag_system.ai_generator, 'generate_response') as mock_generate:
-                    mock_generate.return_value = "Database connection failed"
-                    
-                    response, sources = rag_system.query("test query")
-                    
-                    # The error should be handled and returned as response
-                    assert "Database connection failed" in response or response == "Database connection failed"
-                    print("✓ Tool execution errors properly propagated")
-                    
-        except Exception as e:
-            print(f"✗ Tool execution error handling failed: {e}")
-            assert False, f"Tool errors should be handled gracefully: {e}"
+        # Mock the vector store to return an error
+        monkeypatch.setattr(
+            rag_system_shared.vector_store, "search",
+            lambda *args, **kwargs: SearchResults.empty("Database connection failed")
+        )
+        
+        # Mock AI generator to simulate tool usage
+        monkeypatch.setattr(
+            rag_system_shared.ai_generator, "generate_response",
+            lambda *args, **kwargs: "Database connection failed"
+        )
+        
+        response, sources = rag_system_shared.query("test query")
+        
+        # The error should be handled and returned as response
+        assert "Database connection failed" in response or response == "Database connection failed"
     
-    def test_realistic_workflow_failure_points(self):
+    @pytest.mark.slow
+    def test_realistic_workflow_failure_points(self, isolated_config):
         """Test the complete workflow to identify failure points"""
-        try:
-            print("\n=== Testing Complete RAG Workflow ===")
-            
-            # 1. Initialize system
-            print("1. Initializing RAG system...")
-            rag_system = RAGSystem(config)
-            print("   ✓ RAG system initialized")
-            
-            # 2. Try to load documents from docs folder
-            print("2. Loading documents...")
-            docs_path = "../docs"
-            if os.path.exists(docs_path):
-                courses, chunks = rag_system.add_course_folder(docs_path)
-                print(f"   ✓ Loaded {courses} courses, {chunks} chunks")
-            else:
-                print("   ⚠ No docs folder found, continuing with empty system")
-            
-            # 3. Test query with mocked AI response
-            print("3. Testing query...")
-            with patch.object(rag_system.ai_generator, 'generate_response') as mock_generate:
-                mock_generate.return_value = "This is a test response"
-                
-                response, sources = rag_system.query("What is artificial intelligence?")
-                print(f"   ✓ Query successful: {response[:50]}...")
-                print(f"   ✓ Sources returned: {len(sources)} items")
+        # 1. Initialize system
+        rag_system = RAGSystem(isolated_config)
+        
+        # 2. Try to load documents from docs folder, continuing with an empty system if absent
+        docs_path = "../docs"
+        if os.path.exists(docs_path):
+            rag_system.add_course_folder(docs_path)
+        
+        # 3. Test query with mocked AI response
+        with patch.object(rag_system.ai_generator, 'generate_response') as mock_generate:
+            mock_generate.return_value = "This is a test response"
             
-            print("=== All workflow steps completed successfully ===")
+            response, sources = rag_system.query("What is artificial intelligence?")
             
-        except Exception as e:
-            print(f"✗ Workflow failed at step: {e}")
-            import traceback
-            print("Full traceback:")
-            print(traceback.format_exc())
-            assert False, f"Complete workflow should not fail: {e}"
-
-
-if __name__ == "__main__":
-    pytest.main([__file__, "-v", "-s"])
\ No newline at end of file
+            assert response == "This is a test response"
+            assert isinstance(sources, list)
@@ -1,67 +1,126 @@
+"""
+RAG system tests with all of RAGSystem's components mocked out.
+"""
 import pytest
 import unittest.mock as mock
-import os
+from collections import namedtuple
+from contextlib import ExitStack
 from rag_system import RAGSystem
-from models import Course, Lesson
+from models import Course
 
 
-class MockConfig:
-    """Mock configuration for testing"""
+# RAGSystem's component classes, patched in rag_system for the tests below
+_DEPENDENCIES = (
+    'DocumentProcessor', 'VectorStore', 'AIGenerator', 'SessionManager',
+    'ToolManager', 'CourseSearchTool', 'CourseOutlineTool'
+)
+
+# Validated once; tests derive their courses with model_copy, which skips validation
+_COURSE_PROTO = Course(title="", instructor="Prof", course_link="", lessons=[])
+
+_PatchedDeps = namedtuple('PatchedDeps', [
+    'doc_processor', 'vector_store', 'ai_generator', 'session_manager',
+    'tool_manager', 'search_tool', 'outline_tool'
+])
+
+
+@pytest.fixture(scope="module")
+def patched_rag_deps():
+    """Patch all dependencies once for the module"""
+    # autospec=False: the plain MagicMocks need no introspection of the real classes
+    with ExitStack() as stack:
+        yield _PatchedDeps(*(
+            stack.enter_context(mock.patch(f'rag_system.{name}', autospec=False))
+            for name in _DEPENDENCIES
+        ))
+
+
+@pytest.fixture(scope="module")
+def _rag_prototype(patched_rag_deps, mock_config):
+    """RAG system wired to the patched dependencies, built once for the module"""
+    return RAGSystem(mock_config)
+
+
+class _FakeOsPath:
+    """Stand-in for the os.path functions RAGSystem.add_course_folder calls"""
+    
     def __init__(self):
-        self.CHUNK_SIZE = 1000
-        self.CHUNK_OVERLAP = 100
-        self.CHROMA_PATH = "test_chroma"
-        self.EMBEDDING_MODEL = "all-MiniLM-L6-v2"
-        self.MAX_RESULTS = 5
-        self.ANTHROPIC_API_KEY = "test_key"
-        self.ANTHROPIC_MODEL = "claude-3-sonnet-20241022"
-        self.MAX_HISTORY = 10
+        self.exists = mock.Mock(return_value=True)
+        self.isfile = mock.Mock(return_value=True)
+        self.join = mock.Mock(side_effect=lambda *parts: "/".join(parts))
 
 
-class TestRAGSystem:
-    """Test suite for RAG System functionality"""
+class _FakeOs:
+    """Stand-in for the os module as used by rag_system"""
     
-    def setup_method(self):
-        """Setup test fixtures before each test method"""
-        self.mock_config = MockConfig()
-        
-        # Create patches for all dependencies
-        self.mock_doc_processor = mock.patch('rag_system.DocumentProcessor').start()
-        self.mock_vector_store = mock.patch('rag_system.VectorStore').start()
-        self.mock_ai_generator = mock.patch('rag_system.AIGenerator').start()
-        self.mock_session_manager = mock.patch('rag_system.SessionManager').start()
-        self.mock_tool_manager = mock.patch('rag_system.ToolManager').start()
-        self.mock_search_tool = mock.patch('rag_system.CourseSearchTool').start()
-        self.mock_outline_tool = mock.patch('rag_system.CourseOutlineTool').start()
-        
-        # Create the RAG system
-        self.rag_system = RAGSystem(self.mock_config)
+    def __init__(self):
+        self.path = _FakeOsPath()
+        self.listdir = mock.Mock(return_value=[])
+
+
+@pytest.fixture
+def fake_os(monkeypatch):
+    """Swap rag_system's os module for a fake at a single patch site"""
+    fake = _FakeOs()
+    monkeypatch.setattr('rag_system.os', fake)
+    return fake
+
+
+@pytest.fixture
+def rag_light(request, patched_rag_deps):
+    """Reset the patched dependencies and expose them on the test instance"""
+    for dependency in patched_rag_deps:
+        # Keep each class's instance mock (the prototype holds it) but clear its state
+        dependency.reset_mock()
+        dependency.return_value.reset_mock(return_value=True, side_effect=True)
     
-    def teardown_method(self):
-        """Clean up after each test method"""
-        mock.patch.stopall()
+    test = request.instance
+    (test.mock_doc_processor, test.mock_vector_store, test.mock_ai_generator,
+     test.mock_session_manager, test.mock_tool_manager, test.mock_search_tool,
+     test.mock_outline_tool) = patched_rag_deps
+
+
+@pytest.fixture
+def rag_full(request, rag_light, _rag_prototype):
+    """Additionally hand the test the module's RAG system"""
+    # Its components are the patched dependencies' instance mocks, which rag_light
+    # has just reset, so sharing the one instance leaks nothing between tests
+    request.instance.rag_system = _rag_prototype
+
+
+@pytest.mark.usefixtures("rag_light")
+class TestRAGSystemInit:
+    """Test suite for RAG System construction"""
     
-    def test_initialization(self):
+    def test_initialization(self, mock_config):
         """Test RAG system initialization"""
+        RAGSystem(mock_config)
+        
         # Verify all components were initialized with correct parameters
         self.mock_doc_processor.assert_called_once_with(1000, 100)
-        self.mock_vector_store.assert_called_once_with("test_chroma", "all-MiniLM-L6-v2", 5)
+        self.mock_vector_store.assert_called_once_with(
+            "test_chroma", "all-MiniLM-L6-v2", 5
+        )
         self.mock_ai_generator.assert_called_once_with("test_key", "claude-3-sonnet-20241022")
         self.mock_session_manager.assert_called_once_with(10)
         
         # Verify tools were registered
         tool_manager_instance = self.mock_tool_manager.return_value
         assert tool_manager_instance.register_tool.call_count == 2
+
+
+@pytest.mark.usefixtures("rag_full")
+class TestRAGSystem:
+    """Test suite for RAG System functionality"""
     
     def test_add_course_document_success(self):
         """Test successful addition of a course document"""
         # Mock successful document processing
-        mock_course = Course(
-            title="Test Course",
-            instructor="Test Instructor",
-            course_link="http://test.com",
-            lessons=[]
-        )
+        mock_course = _COURSE_PROTO.model_copy(update={
+            "title": "Test Course",
+            "instructor": "Test Instructor",
+            "course_link": "http://test.com"
+        })
         mock_chunks = [mock.MagicMock(), mock.MagicMock()]
         
         doc_processor_instance = self.mock_doc_processor.return_value
@@ -93,97 +152,58 @@ class TestRAGSystem:
         assert result_course is None
         assert result_chunks == 0
     
-    @mock.patch('rag_system.os.path.exists')
-    @mock.patch('rag_system.os.listdir')
-    @mock.patch('rag_system.os.path.isfile')
-    def test_add_course_folder_success(self, mock_isfile, mock_listdir, mock_exists):
-        """Test successful addition of course folder"""
-        # Mock file system
-        mock_exists.return_value = True
-        mock_listdir.return_value = ["course1.txt", "course2.pdf", "readme.md"]
-        mock_isfile.return_value = True
-        
+    @pytest.mark.parametrize(
+        "exists, listdir, existing_titles, clear_existing, documents, expected_counts",
+        [
+            pytest.param(
+                True, ["course1.txt", "course2.pdf", "readme.md"], [], False,
+                [("Course 1", 1), ("Course 2", 2)], (2, 3), id="success"
+            ),
+            pytest.param(False, [], [], False, [], (0, 0), id="nonexistent"),
+            pytest.param(
+                True, ["course1.txt"], [], True, [("Course 1", 0)], (1, 0), id="clear_existing"
+            ),
+            # Existing courses are skipped rather than added to the vector store again
+            pytest.param(
+                True, ["course1.txt"], ["Course 1"], False, [("Course 1", 0)], (0, 0),
+                id="skip_existing"
+            ),
+        ]
+    )
+    def test_add_course_folder(
+        self, fake_os, exists, listdir, existing_titles, clear_existing, documents, expected_counts
+    ):
+        """Test adding a course folder across folder and vector store states"""
         # Mock vector store
         vector_store_instance = self.mock_vector_store.return_value
-        vector_store_instance.get_existing_course_titles.return_value = []
+        vector_store_instance.get_existing_course_titles.return_value = existing_titles
         
-        # Mock document processor
+        # Mock document processor: one (course, chunks) result per course document
         doc_processor_instance = self.mock_doc_processor.return_value
-        mock_course1 = Course(title="Course 1", instructor="Prof A", course_link="", lessons=[])
-        mock_course2 = Course(title="Course 2", instructor="Prof B", course_link="", lessons=[])
-        mock_chunks1 = [mock.MagicMock()]
-        mock_chunks2 = [mock.MagicMock(), mock.MagicMock()]
-        
         doc_processor_instance.process_course_document.side_effect = [
-            (mock_course1, mock_chunks1),
-            (mock_course2, mock_chunks2)
+            (
+                _COURSE_PROTO.model_copy(update={"title": title}),
+                [mock.MagicMock() for _ in range(chunk_count)]
+            )
+            for title, chunk_count in documents
         ]
         
-        total_courses, total_chunks = self.rag_system.add_course_folder("test_folder")
+        # Mock file system
+        fake_os.path.exists.return_value = exists
+        fake_os.listdir.return_value = listdir
+        
+        total_courses, total_chunks = self.rag_system.add_course_folder(
+            "test_folder", clear_existing=clear_existing
+        )
         
         # Verify calls
-        assert doc_processor_instance.process_course_document.call_count == 2
-        assert vector_store_instance.add_course_metadata.call_count == 2
-        assert vector_store_instance.add_course_content.call_count == 2
+        assert vector_store_instance.clear_all_data.call_count == int(clear_existing)
+        assert doc_processor_instance.process_course_document.call_count == len(documents)
+        assert vector_store_instance.add_course_metadata.call_count == expected_counts[0]
+        assert vector_store_instance.add_course_content.call_count == expected_counts[0]
         
         # Verify results
-        assert total_courses == 2
-        assert total_chunks == 3
-    
-    @mock.patch('rag_system.os.path.exists')
-    def test_add_course_folder_nonexistent(self, mock_exists):
-        """Test handling of nonexistent folder"""
-        mock_exists.return_value = False
-        
-        total_courses, total_chunks = self.rag_system.add_course_folder("nonexistent_folder")
-        
-        assert total_courses == 0
-        assert total_chunks == 0
-    
-    @mock.patch('rag_system.os.path.exists')
-    @mock.patch('rag_system.os.listdir')
-    @mock.patch('rag_system.os.path.isfile')
-    def test_add_course_folder_with_clear_existing(self, mock_isfile, mock_listdir, mock_exists):
-        """Test folder addition with clear_existing=True"""
-        mock_exists.return_value = True
-        mock_listdir.return_value = ["course1.txt"]
-        mock_isfile.return_value = True
-        
-        vector_store_instance = self.mock_vector_store.return_value
-        vector_store_instance.get_existing_course_titles.return_value = []
-        
-        doc_processor_instance = self.mock_doc_processor.return_value
-        mock_course = Course(title="Course 1", instructor="Prof", course_link="", lessons=[])
-        doc_processor_instance.process_course_document.return_value = (mock_course, [])
-        
-        self.rag_system.add_course_folder("test_folder", clear_existing=True)
-        
-        # Verify clear_all_data was called
-        vector_store_instance.clear_all_data.assert_called_once()
-    
-    @mock.patch('rag_system.os.path.exists')
-    @mock.patch('rag_system.os.listdir')
-    @mock.patch('rag_system.os.path.isfile')
-    def test_add_course_folder_skip_existing(self, mock_isfile, mock_listdir, mock_exists):
-        """Test that existing courses are skipped"""
-        mock_exists.return_value = True
-        mock_listdir.return_value = ["course1.txt"]
-        mock_isfile.return_value = True
-        
-        vector_store_instance = self.mock_vector_store.return_value
-        vector_store_instance.get_existing_course_titles.return_value = ["Course 1"]
-        
-        doc_processor_instance = self.mock_doc_processor.return_value
-        mock_course = Course(title="Course 1", instructor="Prof", course_link="", lessons=[])
-        doc_processor_instance.process_course_document.return_value = (mock_course, [])
-        
-        total_courses, total_chunks = self.rag_system.add_course_folder("test_folder")
-        
-        # Should not add to vector store since course already exists
-        assert vector_store_instance.add_course_metadata.call_count == 0
-        assert vector_store_instance.add_course_content.call_count == 0
-        assert total_courses == 0
-        assert total_chunks == 0
+        assert (total_courses, total_chunks) == expected_counts
     
     def test_query_without_session(self):
         """Test query processing without session context"""
@@ -298,7 +318,3 @@ class TestRAGSystem:
         
         assert response == "Generated answer"
         assert sources == [{"text": "Test Source"}]
-
-
-if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
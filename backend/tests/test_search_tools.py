@@ -1,15 +1,43 @@
+"""
+Tests for the course search and outline tools and the ToolManager.
+"""
 import pytest
 import unittest.mock as mock
 from search_tools import CourseSearchTool, CourseOutlineTool, ToolManager
-from vector_store import SearchResults, VectorStore
+from vector_store import SearchResults
+
+
+class _FakeVectorStore:
+    """Lightweight stand-in for the VectorStore methods the tools call"""
+    
+    def __init__(self):
+        self.search = mock.Mock()
+        self._resolve_course_name = mock.Mock()
+        self.get_all_courses_metadata = mock.Mock()
+        self.get_lesson_link = mock.Mock()
+
+
+@pytest.fixture
+def vector_store_mock():
+    """Fresh fake VectorStore for each test"""
+    return _FakeVectorStore()
+
+
+@pytest.fixture
+def make_results():
+    """Factory for SearchResults, defaulting to an empty result set"""
+    def _make_results(docs=(), meta=(), dists=(), error=None):
+        return SearchResults(list(docs), list(meta), list(dists), error)
+    return _make_results
 
 
 class TestCourseSearchTool:
     """Test suite for CourseSearchTool functionality"""
     
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def _search_tool(self, vector_store_mock):
         """Setup test fixtures before each test method"""
-        self.mock_vector_store = mock.MagicMock(spec=VectorStore)
+        self.mock_vector_store = vector_store_mock
         self.search_tool = CourseSearchTool(self.mock_vector_store)
     
     def test_get_tool_definition(self):
@@ -22,121 +50,61 @@ class TestCourseSearchTool:
         assert definition["input_schema"]["properties"]["query"]["type"] == "string"
         assert "query" in definition["input_schema"]["required"]
     
-    def test_execute_successful_search(self):
-        """Test successful search execution with results"""
-        # Mock successful search results
-        mock_results = SearchResults(
-            documents=["Test content from course"],
-            metadata=[{"course_title": "Test Course", "lesson_number": 1}],
-            distances=[0.8],
-            error=None
-        )
-        self.mock_vector_store.search.return_value = mock_results
-        
-        result = self.search_tool.execute("test query")
-        
-        # Verify vector store was called correctly
+    @pytest.mark.parametrize("results, execute_kwargs, expected", [
+        pytest.param(
+            dict(docs=["Test content from course"],
+                 meta=[{"course_title": "Test Course", "lesson_number": 1}], dists=[0.8]),
+            {}, "[Test Course - Lesson 1]\nTest content from course",
+            id="successful_search"
+        ),
+        pytest.param(
+            dict(docs=["Filtered content"],
+                 meta=[{"course_title": "Filtered Course", "lesson_number": 2}], dists=[0.7]),
+            {"course_name": "Filtered Course"}, "[Filtered Course - Lesson 2]\nFiltered content",
+            id="course_filter"
+        ),
+        pytest.param(
+            dict(docs=["Lesson specific content"],
+                 meta=[{"course_title": "Test Course", "lesson_number": 3}], dists=[0.6]),
+            {"lesson_number": 3}, "[Test Course - Lesson 3]\nLesson specific content",
+            id="lesson_filter"
+        ),
+        pytest.param(
+            dict(error="Database connection failed"), {}, "Database connection failed",
+            id="error_handling"
+        ),
+        pytest.param({}, {}, "No relevant content found.", id="empty_results"),
+        # Empty results message includes filter information
+        pytest.param(
+            {}, {"course_name": "Test Course", "lesson_number": 5},
+            "No relevant content found in course 'Test Course' in lesson 5.",
+            id="empty_results_with_filters"
+        ),
+    ])
+    def test_execute(self, make_results, results, execute_kwargs, expected):
+        """Test search execution across filters, errors and empty results"""
+        self.mock_vector_store.search.return_value = make_results(**results)
+        
+        result = self.search_tool.execute("test query", **execute_kwargs)
+        
+        # Verify vector store was called with the requested filters
         self.mock_vector_store.search.assert_called_once_with(
             query="test query",
-            course_name=None,
-            lesson_number=None
+            course_name=execute_kwargs.get("course_name"),
+            lesson_number=execute_kwargs.get("lesson_number")
         )
         
         # Verify result formatting
-        assert "[Test Course - Lesson 1]" in result
-        assert "Test content from course" in result
+        assert result == expected
     
-    def test_execute_with_course_filter(self):
-        """Test search execution with course name filter"""
-        mock_results = SearchResults(
-            documents=["Filtered content"],
-            metadata=[{"course_title": "Filtered Course", "lesson_number": 2}],
-            distances=[0.7],
-            error=None
-        )
-        self.mock_vector_store.search.return_value = mock_results
-        
-        result = self.search_tool.execute("test query", course_name="Filtered Course")
-        
-        self.mock_vector_store.search.assert_called_once_with(
-            query="test query",
-            course_name="Filtered Course",
-            lesson_number=None
-        )
-        
-        assert "[Filtered Course - Lesson 2]" in result
-    
-    def test_execute_with_lesson_filter(self):
-        """Test search execution with lesson number filter"""
-        mock_results = SearchResults(
-            documents=["Lesson specific content"],
-            metadata=[{"course_title": "Test Course", "lesson_number": 3}],
-            distances=[0.6],
-            error=None
-        )
-        self.mock_vector_store.search.return_value = mock_results
-        
-        result = self.search_tool.execute("test query", lesson_number=3)
-        
-        self.mock_vector_store.search.assert_called_once_with(
-            query="test query",
-            course_name=None,
-            lesson_number=3
-        )
-        
-        assert "[Test Course - Lesson 3]" in result
-    
-    def test_execute_error_handling(self):
-        """Test handling of search errors"""
-        mock_results = SearchResults(
-            documents=[],
-            metadata=[],
-            distances=[],
-            error="Database connection failed"
-        )
-        self.mock_vector_store.search.return_value = mock_results
-        
-        result = self.search_tool.execute("test query")
-        
-        assert result == "Database connection failed"
-    
-    def test_execute_empty_results(self):
-        """Test handling of empty search results"""
-        mock_results = SearchResults(
-            documents=[],
-            metadata=[],
-            distances=[],
-            error=None
-        )
-        self.mock_vector_store.search.return_value = mock_results
-        
-        result = self.search_tool.execute("nonexistent query")
-        
-        assert "No relevant content found" in result
-    
-    def test_execute_empty_results_with_filters(self):
-        """Test empty results message includes filter information"""
-        mock_results = SearchResults(
-            documents=[],
-            metadata=[],
-            distances=[],
-            error=None
-        )
-        self.mock_vector_store.search.return_value = mock_results
-        
-        result = self.search_tool.execute("query", course_name="Test Course", lesson_number=5)
-        
-        assert "No relevant content found in course 'Test Course' in lesson 5" in result
-    
-    def test_format_results_with_sources(self):
+    def test_format_results_with_sources(self, make_results):
         """Test that sources are properly tracked for UI"""
         self.mock_vector_store.get_lesson_link.return_value = "http://example.com/lesson1"
         
-        mock_results = SearchResults(
-            documents=["Content with link"],
-            metadata=[{"course_title": "Linked Course", "lesson_number": 1}],
-            distances=[0.9],
-            error=None
+        mock_results = make_results(
+            docs=["Content with link"],
+            meta=[{"course_title": "Linked Course", "lesson_number": 1}],
+            dists=[0.9]
         )
         
         result = self.search_tool._format_results(mock_results)
@@ -151,9 +119,10 @@ class TestCourseSearchTool:
 class TestCourseOutlineTool:
     """Test suite for CourseOutlineTool functionality"""
     
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def _outline_tool(self, vector_store_mock):
         """Setup test fixtures before each test method"""
-        self.mock_vector_store = mock.MagicMock(spec=VectorStore)
+        self.mock_vector_store = vector_store_mock
         self.outline_tool = CourseOutlineTool(self.mock_vector_store)
     
     def test_get_tool_definition(self):
@@ -265,31 +234,36 @@ class TestToolManager:
         
         assert result == "Tool 'nonexistent_tool' not found"
     
-    def test_get_last_sources(self):
-        """Test getting sources from tools"""
-        # Create mock tool with sources
+    @pytest.fixture(scope="class")
+    def tm_with_source_tool(self):
+        """Tool manager with a source-tracking tool, registered once for the class"""
+        tool_manager = ToolManager()
         tool_with_sources = mock.MagicMock()
         tool_with_sources.get_tool_definition.return_value = {"name": "source_tool"}
+        tool_manager.register_tool(tool_with_sources)
+        return tool_manager, tool_with_sources
+    
+    @pytest.fixture
+    def source_tool_manager(self, tm_with_source_tool):
+        """Give the registered tool its sources for one test"""
+        tool_manager, tool_with_sources = tm_with_source_tool
         tool_with_sources.last_sources = [{"text": "Test Source", "url": "http://test.com"}]
+        yield tm_with_source_tool
+        tool_with_sources.last_sources = []
+    
+    def test_get_last_sources(self, source_tool_manager):
+        """Test getting sources from tools"""
+        tool_manager, _ = source_tool_manager
         
-        self.tool_manager.register_tool(tool_with_sources)
-        
-        sources = self.tool_manager.get_last_sources()
+        sources = tool_manager.get_last_sources()
         
         assert len(sources) == 1
         assert sources[0]["text"] == "Test Source"
     
-    def test_reset_sources(self):
+    def test_reset_sources(self, source_tool_manager):
         """Test resetting sources from all tools"""
-        tool_with_sources = mock.MagicMock()
-        tool_with_sources.get_tool_definition.return_value = {"name": "source_tool"}
-        tool_with_sources.last_sources = [{"text": "Test Source"}]
+        tool_manager, tool_with_sources = source_tool_manager
         
-        self.tool_manager.register_tool(tool_with_sources)
-        self.tool_manager.reset_sources()
+        tool_manager.reset_sources()
         
         assert tool_with_sources.last_sources == []
-
-
-if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
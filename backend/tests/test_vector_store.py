@@ -1,21 +1,63 @@
+"""
+VectorStore and SearchResults tests against a mocked ChromaDB.
+"""
+import itertools
+import types
 import pytest
 import unittest.mock as mock
+from dataclasses import dataclass
 from vector_store import VectorStore, SearchResults
 from models import Course, Lesson, CourseChunk
 
 
+# Read-only sample data shared by the tests below; the models are known-valid,
+# so they are built with model_construct() and skip validation
+_SAMPLE_CHROMA_RESULTS = {
+    'documents': [['doc1', 'doc2']],
+    'metadatas': [[{'title': 'Course A'}, {'title': 'Course B'}]],
+    'distances': [[0.1, 0.2]]
+}
+
+_SAMPLE_LESSONS = [
+    Lesson.model_construct(lesson_number=1, title="Lesson 1", lesson_link="http://lesson1.com"),
+    Lesson.model_construct(lesson_number=2, title="Lesson 2", lesson_link="http://lesson2.com")
+]
+
+# Catalog serialization of _SAMPLE_LESSONS, as written by add_course_metadata
+_SAMPLE_LESSONS_JSON = (
+    '[{"lesson_number": 1, "lesson_title": "Lesson 1", "lesson_link": "http://lesson1.com"}, '
+    '{"lesson_number": 2, "lesson_title": "Lesson 2", "lesson_link": "http://lesson2.com"}]'
+)
+
+_SAMPLE_COURSE = Course.model_construct(
+    title="Test Course",
+    instructor="Test Instructor",
+    course_link="http://course.com",
+    lessons=_SAMPLE_LESSONS
+)
+
+_SAMPLE_CHUNKS = [
+    CourseChunk.model_construct(
+        course_title="Test Course",
+        lesson_number=1,
+        chunk_index=0,
+        content="Chunk content 1"
+    ),
+    CourseChunk.model_construct(
+        course_title="Test Course",
+        lesson_number=1,
+        chunk_index=1,
+        content="Chunk content 2"
+    )
+]
+
+
 class TestSearchResults:
     """Test suite for SearchResults class"""
     
     def test_from_chroma_with_results(self):
         """Test SearchResults creation from ChromaDB results"""
-        chroma_results = {
-            'documents': [['doc1', 'doc2']],
-            'metadatas': [[{'title': 'Course A'}, {'title': 'Course B'}]],
-            'distances': [[0.1, 0.2]]
-        }
-        
-        results = SearchResults.from_chroma(chroma_results)
+        results = SearchResults.from_chroma(_SAMPLE_CHROMA_RESULTS)
         
         assert results.documents == ['doc1', 'doc2']
         assert results.metadata == [{'title': 'Course A'}, {'title': 'Course B'}]
@@ -57,310 +99,285 @@ class TestSearchResults:
         assert results.is_empty() is False
 
 
-class TestVectorStore:
-    """Test suite for VectorStore functionality"""
+_COLLECTION_METHODS = ["query", "add", "get", "delete"]
+
+
+@dataclass
+class VectorStoreMocks:
+    """A VectorStore built on mocked ChromaDB, with the mocks behind it"""
+    chromadb: types.ModuleType
+    settings: mock.Mock
+    client: mock.Mock
+    catalog_collection: mock.Mock
+    content_collection: mock.Mock
+    vector_store: VectorStore
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _fake_chromadb():
+    """Swap a fake chromadb module into vector_store once for this module"""
+    fake_chromadb = types.ModuleType("chromadb")
+    fake_chromadb.PersistentClient = mock.Mock()
+    fake_chromadb.utils = mock.MagicMock()
+    fake_settings = mock.Mock()
+    with pytest.MonkeyPatch.context() as module_monkeypatch:
+        module_monkeypatch.setattr('vector_store.chromadb', fake_chromadb)
+        module_monkeypatch.setattr('vector_store.Settings', fake_settings)
+        yield fake_chromadb, fake_settings
+
+
+def _build_store(fake_chromadb, fake_settings):
+    """Create a VectorStore on the fake chromadb with fresh client and collections"""
+    # Mock client and collections with only the methods VectorStore calls
+    mock_client = mock.Mock(spec_set=["get_or_create_collection", "delete_collection"])
+    fake_chromadb.PersistentClient.return_value = mock_client
     
-    def setup_method(self):
-        """Setup test fixtures before each test method"""
-        # Mock ChromaDB and related components
-        self.mock_chromadb = mock.patch('vector_store.chromadb').start()
-        self.mock_settings = mock.patch('vector_store.Settings').start()
-        
-        # Mock client and collections
-        self.mock_client = mock.MagicMock()
-        self.mock_chromadb.PersistentClient.return_value = self.mock_client
-        
-        self.mock_catalog_collection = mock.MagicMock()
-        self.mock_content_collection = mock.MagicMock()
-        
-        # Configure get_or_create_collection to return different collections
-        def side_effect(name, embedding_function):
-            if name == "course_catalog":
-                return self.mock_catalog_collection
-            elif name == "course_content":
-                return self.mock_content_collection
-            return mock.MagicMock()
-        
-        self.mock_client.get_or_create_collection.side_effect = side_effect
-        
-        # Create VectorStore instance
-        self.vector_store = VectorStore("test_path", "test_model", 5)
+    mock_catalog_collection = mock.Mock(spec_set=_COLLECTION_METHODS)
+    mock_content_collection = mock.Mock(spec_set=_COLLECTION_METHODS)
     
-    def teardown_method(self):
-        """Clean up after each test method"""
-        mock.patch.stopall()
+    # VectorStore always creates the catalog collection, then the content one
+    mock_client.get_or_create_collection.side_effect = itertools.cycle(
+        [mock_catalog_collection, mock_content_collection]
+    )
     
-    def test_initialization(self):
+    # Create VectorStore instance
+    return VectorStoreMocks(
+        chromadb=fake_chromadb,
+        settings=fake_settings,
+        client=mock_client,
+        catalog_collection=mock_catalog_collection,
+        content_collection=mock_content_collection,
+        vector_store=VectorStore("test_path", "test_model", 5)
+    )
+
+
+@pytest.fixture
+def fresh_store(_fake_chromadb):
+    """A newly constructed VectorStore, for tests that observe initialization"""
+    fake_chromadb, _ = _fake_chromadb
+    fake_chromadb.PersistentClient.reset_mock()
+    return _build_store(*_fake_chromadb)
+
+
+@pytest.fixture(scope="class")
+def _class_store(_fake_chromadb):
+    """One VectorStore on the fake chromadb shared by a whole test class"""
+    return _build_store(*_fake_chromadb)
+
+
+@pytest.fixture
+def store(_class_store):
+    """The class's shared VectorStore with its mocks reset for one test"""
+    # Keep the client wiring; drop calls and per-test configuration
+    _class_store.client.reset_mock()
+    for collection in (_class_store.catalog_collection, _class_store.content_collection):
+        collection.reset_mock(return_value=True, side_effect=True)
+    return _class_store
+
+
+class TestVectorStoreInit:
+    """Test suite for VectorStore construction"""
+    
+    def test_initialization(self, fresh_store):
         """Test VectorStore initialization"""
         # Verify ChromaDB client creation
-        self.mock_chromadb.PersistentClient.assert_called_once_with(
+        fresh_store.chromadb.PersistentClient.assert_called_once_with(
             path="test_path",
-            settings=self.mock_settings.return_value
+            settings=fresh_store.settings.return_value
         )
         
         # Verify collections were created
-        assert self.mock_client.get_or_create_collection.call_count == 2
+        assert fresh_store.client.get_or_create_collection.call_count == 2
         
         # Verify instance attributes
-        assert self.vector_store.max_results == 5
-        assert self.vector_store.course_catalog == self.mock_catalog_collection
-        assert self.vector_store.course_content == self.mock_content_collection
+        assert fresh_store.vector_store.max_results == 5
+        assert fresh_store.vector_store.course_catalog == fresh_store.catalog_collection
+        assert fresh_store.vector_store.course_content == fresh_store.content_collection
+
+
+class TestVectorStore:
+    """Test suite for VectorStore functionality"""
     
-    def test_search_successful(self):
-        """Test successful search operation"""
-        # Mock successful search results
-        mock_query_results = {
-            'documents': [['Found content']],
-            'metadatas': [[{'course_title': 'Test Course', 'lesson_number': 1}]],
-            'distances': [[0.1]]
-        }
-        self.mock_content_collection.query.return_value = mock_query_results
-        
-        results = self.vector_store.search("test query")
+    @pytest.mark.parametrize(
+        "query_kwargs, catalog_return, content_return, expected_where, expected_error",
+        [
+            pytest.param(
+                {},
+                None,
+                {
+                    'documents': [['Found content']],
+                    'metadatas': [[{'course_title': 'Test Course', 'lesson_number': 1}]],
+                    'distances': [[0.1]]
+                },
+                None, None, id="successful"
+            ),
+            # Course name is resolved through the catalog before filtering content
+            pytest.param(
+                {"course_name": "Course"},
+                {'documents': [['Course Title']], 'metadatas': [[{'title': 'Resolved Course'}]]},
+                {
+                    'documents': [['Filtered content']],
+                    'metadatas': [[{'course_title': 'Resolved Course'}]],
+                    'distances': [[0.2]]
+                },
+                {"course_title": "Resolved Course"}, None, id="course_filter"
+            ),
+            pytest.param(
+                {"lesson_number": 3},
+                None,
+                {
+                    'documents': [['Lesson content']],
+                    'metadatas': [[{'lesson_number': 3}]],
+                    'distances': [[0.3]]
+                },
+                {"lesson_number": 3}, None, id="lesson_filter"
+            ),
+            pytest.param(
+                {"course_name": "Test", "lesson_number": 2},
+                {'documents': [['Course Title']], 'metadatas': [[{'title': 'Test Course'}]]},
+                {
+                    'documents': [['Combined filter content']],
+                    'metadatas': [[{'course_title': 'Test Course', 'lesson_number': 2}]],
+                    'distances': [[0.15]]
+                },
+                {"$and": [{"course_title": "Test Course"}, {"lesson_number": 2}]}, None,
+                id="combined_filters"
+            ),
+            pytest.param(
+                {}, None, Exception("Database error"), None, "Search error: Database error",
+                id="error_handling"
+            ),
+        ]
+    )
+    def test_search(
+        self, store, query_kwargs, catalog_return, content_return, expected_where, expected_error
+    ):
+        """Test search across filters and content query failures"""
+        store.catalog_collection.query.return_value = catalog_return
+        if isinstance(content_return, Exception):
+            store.content_collection.query.side_effect = content_return
+        else:
+            store.content_collection.query.return_value = content_return
+        
+        results = store.vector_store.search("test query", **query_kwargs)
+        
+        # Verify course resolution ran only when a course name was given
+        if catalog_return is None:
+            store.catalog_collection.query.assert_not_called()
+        else:
+            store.catalog_collection.query.assert_called_once_with(
+                query_texts=[query_kwargs["course_name"]],
+                n_results=1
+            )
         
-        # Verify query was called correctly
-        self.mock_content_collection.query.assert_called_once_with(
-            query_texts=["test query"],
-            n_results=5,
-            where=None
+        # Verify content search with filter; filtered cases only check the where
+        # clause, the query text and limit are covered by the unfiltered cases
+        if expected_where is None:
+            query_texts, n_results = ["test query"], 5
+        else:
+            query_texts, n_results = mock.ANY, mock.ANY
+        store.content_collection.query.assert_called_once_with(
+            query_texts=query_texts,
+            n_results=n_results,
+            where=expected_where
         )
         
         # Verify results
-        assert results.documents == ['Found content']
-        assert results.metadata == [{'course_title': 'Test Course', 'lesson_number': 1}]
-        assert results.distances == [0.1]
-        assert results.error is None
+        assert results.error == expected_error
+        if expected_error:
+            assert results.is_empty()
+        else:
+            assert results.documents == content_return['documents'][0]
+            assert results.metadata == content_return['metadatas'][0]
+            assert results.distances == content_return['distances'][0]
     
-    def test_search_with_course_filter(self):
-        """Test search with course name filtering"""
-        # Mock course name resolution
-        self.mock_catalog_collection.query.return_value = {
-            'documents': [['Course Title']],
-            'metadatas': [[{'title': 'Resolved Course'}]]
-        }
-        
-        # Mock content search
-        mock_query_results = {
-            'documents': [['Filtered content']],
-            'metadatas': [[{'course_title': 'Resolved Course'}]],
-            'distances': [[0.2]]
-        }
-        self.mock_content_collection.query.return_value = mock_query_results
-        
-        results = self.vector_store.search("test query", course_name="Course")
-        
-        # Verify course resolution was called
-        self.mock_catalog_collection.query.assert_called_once_with(
-            query_texts=["Course"],
-            n_results=1
-        )
-        
-        # Verify content search with filter
-        self.mock_content_collection.query.assert_called_once_with(
-            query_texts=["test query"],
-            n_results=5,
-            where={"course_title": "Resolved Course"}
-        )
-    
-    def test_search_course_not_found(self):
+    def test_search_course_not_found(self, store):
         """Test search when course cannot be resolved"""
         # Mock failed course resolution
-        self.mock_catalog_collection.query.return_value = {
+        store.catalog_collection.query.return_value = {
             'documents': [[]],
             'metadatas': [[]]
         }
         
-        results = self.vector_store.search("test query", course_name="Nonexistent Course")
+        results = store.vector_store.search("test query", course_name="Nonexistent Course")
         
         assert results.error == "No course found matching 'Nonexistent Course'"
         assert results.is_empty()
     
-    def test_search_with_lesson_filter(self):
-        """Test search with lesson number filtering"""
-        mock_query_results = {
-            'documents': [['Lesson content']],
-            'metadatas': [[{'lesson_number': 3}]],
-            'distances': [[0.3]]
-        }
-        self.mock_content_collection.query.return_value = mock_query_results
-        
-        results = self.vector_store.search("test query", lesson_number=3)
-        
-        self.mock_content_collection.query.assert_called_once_with(
-            query_texts=["test query"],
-            n_results=5,
-            where={"lesson_number": 3}
-        )
-    
-    def test_search_with_combined_filters(self):
-        """Test search with both course and lesson filters"""
-        # Mock course resolution
-        self.mock_catalog_collection.query.return_value = {
-            'documents': [['Course Title']],
-            'metadatas': [[{'title': 'Test Course'}]]
-        }
-        
-        mock_query_results = {
-            'documents': [['Combined filter content']],
-            'metadatas': [[{'course_title': 'Test Course', 'lesson_number': 2}]],
-            'distances': [[0.15]]
-        }
-        self.mock_content_collection.query.return_value = mock_query_results
-        
-        results = self.vector_store.search("test query", course_name="Test", lesson_number=2)
-        
-        expected_filter = {"$and": [
-            {"course_title": "Test Course"},
-            {"lesson_number": 2}
-        ]}
-        
-        self.mock_content_collection.query.assert_called_once_with(
-            query_texts=["test query"],
-            n_results=5,
-            where=expected_filter
-        )
-    
-    def test_search_error_handling(self):
-        """Test search error handling"""
-        self.mock_content_collection.query.side_effect = Exception("Database error")
-        
-        results = self.vector_store.search("test query")
-        
-        assert results.error == "Search error: Database error"
-        assert results.is_empty()
-    
-    def test_add_course_metadata(self):
+    def test_add_course_metadata(self, store):
         """Test adding course metadata"""
-        lessons = [
-            Lesson(lesson_number=1, title="Lesson 1", lesson_link="http://lesson1.com"),
-            Lesson(lesson_number=2, title="Lesson 2", lesson_link="http://lesson2.com")
-        ]
-        course = Course(
-            title="Test Course",
-            instructor="Test Instructor",
-            course_link="http://course.com",
-            lessons=lessons
+        store.vector_store.add_course_metadata(_SAMPLE_COURSE)
+        
+        store.catalog_collection.add.assert_called_once_with(
+            documents=["Test Course"],
+            metadatas=[{
+                "title": "Test Course",
+                "instructor": "Test Instructor",
+                "course_link": "http://course.com",
+                "lessons_json": _SAMPLE_LESSONS_JSON,
+                "lesson_count": 2
+            }],
+            ids=["Test Course"]
         )
-        
-        self.vector_store.add_course_metadata(course)
-        
-        # Verify the catalog collection was called correctly
-        self.mock_catalog_collection.add.assert_called_once()
-        call_args = self.mock_catalog_collection.add.call_args[1]
-        
-        assert call_args["documents"] == ["Test Course"]
-        assert call_args["ids"] == ["Test Course"]
-        
-        metadata = call_args["metadatas"][0]
-        assert metadata["title"] == "Test Course"
-        assert metadata["instructor"] == "Test Instructor"
-        assert metadata["course_link"] == "http://course.com"
-        assert metadata["lesson_count"] == 2
-        
-        # Verify lessons JSON structure
-        import json
-        lessons_data = json.loads(metadata["lessons_json"])
-        assert len(lessons_data) == 2
-        assert lessons_data[0]["lesson_number"] == 1
-        assert lessons_data[0]["lesson_title"] == "Lesson 1"
-        assert lessons_data[0]["lesson_link"] == "http://lesson1.com"
     
-    def test_add_course_content(self):
+    def test_add_course_content(self, store):
         """Test adding course content chunks"""
-        chunks = [
-            CourseChunk(
-                course_title="Test Course",
-                lesson_number=1,
-                chunk_index=0,
-                content="Chunk content 1"
-            ),
-            CourseChunk(
-                course_title="Test Course",
-                lesson_number=1,
-                chunk_index=1,
-                content="Chunk content 2"
-            )
-        ]
-        
-        self.vector_store.add_course_content(chunks)
-        
-        # Verify the content collection was called correctly
-        self.mock_content_collection.add.assert_called_once()
-        call_args = self.mock_content_collection.add.call_args[1]
-        
-        assert call_args["documents"] == ["Chunk content 1", "Chunk content 2"]
-        assert call_args["ids"] == ["Test_Course_0", "Test_Course_1"]
-        
-        metadata = call_args["metadatas"]
-        assert len(metadata) == 2
-        assert metadata[0]["course_title"] == "Test Course"
-        assert metadata[0]["lesson_number"] == 1
-        assert metadata[0]["chunk_index"] == 0
+        store.vector_store.add_course_content(_SAMPLE_CHUNKS)
+        
+        store.content_collection.add.assert_called_once_with(
+            documents=["Chunk content 1", "Chunk content 2"],
+            metadatas=[
+                {"course_title": "Test Course", "lesson_number": 1, "chunk_index": 0},
+                {"course_title": "Test Course", "lesson_number": 1, "chunk_index": 1}
+            ],
+            ids=["Test_Course_0", "Test_Course_1"]
+        )
     
-    def test_add_course_content_empty(self):
+    def test_add_course_content_empty(self, store):
         """Test adding empty course content"""
-        self.vector_store.add_course_content([])
+        store.vector_store.add_course_content([])
         
         # Should not call add on empty chunks
-        self.mock_content_collection.add.assert_not_called()
+        store.content_collection.add.assert_not_called()
     
-    def test_clear_all_data(self):
+    def test_clear_all_data(self, store):
         """Test clearing all data"""
-        self.vector_store.clear_all_data()
+        store.vector_store.clear_all_data()
         
         # Verify collections were deleted
-        self.mock_client.delete_collection.assert_any_call("course_catalog")
-        self.mock_client.delete_collection.assert_any_call("course_content")
+        store.client.delete_collection.assert_any_call("course_catalog")
+        store.client.delete_collection.assert_any_call("course_content")
         
-        # Verify collections were recreated
-        assert self.mock_client.get_or_create_collection.call_count >= 4  # 2 initial + 2 after clear
+        # Verify collections were recreated (the store's mocks are reset after init)
+        assert store.client.get_or_create_collection.call_count == 2
+        assert store.vector_store.course_catalog == store.catalog_collection
+        assert store.vector_store.course_content == store.content_collection
     
-    def test_get_existing_course_titles(self):
-        """Test getting existing course titles"""
-        self.mock_catalog_collection.get.return_value = {
-            'ids': ['Course A', 'Course B', 'Course C']
-        }
-        
-        titles = self.vector_store.get_existing_course_titles()
-        
-        self.mock_catalog_collection.get.assert_called_once()
-        assert titles == ['Course A', 'Course B', 'Course C']
+    @pytest.mark.parametrize("ids", [
+        pytest.param(['Course A', 'Course B', 'Course C'], id="populated"),
+        pytest.param([], id="empty"),
+    ])
+    def test_get_existing_course_titles_and_count(self, store, ids):
+        """Test course titles and course count read from one catalog listing"""
+        store.catalog_collection.get.return_value = {'ids': ids}
+        
+        assert store.vector_store.get_existing_course_titles() == ids
+        assert store.vector_store.get_course_count() == len(ids)
+        
+        assert store.catalog_collection.get.call_count == 2
     
-    def test_get_existing_course_titles_empty(self):
-        """Test getting existing course titles when empty"""
-        self.mock_catalog_collection.get.return_value = {'ids': []}
-        
-        titles = self.vector_store.get_existing_course_titles()
-        
-        assert titles == []
-    
-    def test_get_course_count(self):
-        """Test getting course count"""
-        self.mock_catalog_collection.get.return_value = {
-            'ids': ['Course A', 'Course B']
-        }
-        
-        count = self.vector_store.get_course_count()
-        
-        assert count == 2
-    
-    def test_get_all_courses_metadata(self):
+    def test_get_all_courses_metadata(self, store):
         """Test getting all courses metadata with JSON parsing"""
-        import json
-        lessons_json = json.dumps([
-            {"lesson_number": 1, "lesson_title": "Intro", "lesson_link": "http://lesson1.com"}
-        ])
-        
-        self.mock_catalog_collection.get.return_value = {
+        store.catalog_collection.get.return_value = {
             'metadatas': [{
                 'title': 'Test Course',
                 'instructor': 'Prof Test',
-                'lessons_json': lessons_json,
-                'lesson_count': 1
+                'lessons_json': _SAMPLE_LESSONS_JSON,
+                'lesson_count': 2
             }]
         }
         
-        metadata = self.vector_store.get_all_courses_metadata()
+        metadata = store.vector_store.get_all_courses_metadata()
         
         assert len(metadata) == 1
         course_meta = metadata[0]
@@ -368,45 +385,30 @@ class TestVectorStore:
         assert course_meta['instructor'] == 'Prof Test'
         assert 'lessons_json' not in course_meta  # Should be removed after parsing
         assert 'lessons' in course_meta  # Should be added after parsing
-        assert len(course_meta['lessons']) == 1
-        assert course_meta['lessons'][0]['lesson_title'] == 'Intro'
+        assert len(course_meta['lessons']) == 2
+        assert course_meta['lessons'][0]['lesson_title'] == 'Lesson 1'
     
-    def test_get_lesson_link(self):
+    def test_get_lesson_link(self, store):
         """Test getting lesson link"""
-        import json
-        lessons_json = json.dumps([
-            {"lesson_number": 1, "lesson_title": "Intro", "lesson_link": "http://lesson1.com"},
-            {"lesson_number": 2, "lesson_title": "Advanced", "lesson_link": "http://lesson2.com"}
-        ])
-        
-        self.mock_catalog_collection.get.return_value = {
+        store.catalog_collection.get.return_value = {
             'metadatas': [{
-                'lessons_json': lessons_json
+                'lessons_json': _SAMPLE_LESSONS_JSON
             }]
         }
         
-        link = self.vector_store.get_lesson_link("Test Course", 2)
+        link = store.vector_store.get_lesson_link("Test Course", 2)
         
-        self.mock_catalog_collection.get.assert_called_once_with(ids=["Test Course"])
+        store.catalog_collection.get.assert_called_once_with(ids=["Test Course"])
         assert link == "http://lesson2.com"
     
-    def test_get_lesson_link_not_found(self):
+    def test_get_lesson_link_not_found(self, store):
         """Test getting lesson link when lesson not found"""
-        import json
-        lessons_json = json.dumps([
-            {"lesson_number": 1, "lesson_title": "Intro", "lesson_link": "http://lesson1.com"}
-        ])
-        
-        self.mock_catalog_collection.get.return_value = {
+        store.catalog_collection.get.return_value = {
             'metadatas': [{
-                'lessons_json': lessons_json
+                'lessons_json': _SAMPLE_LESSONS_JSON
             }]
         }
         
-        link = self.vector_store.get_lesson_link("Test Course", 999)
+        link = store.vector_store.get_lesson_link("Test Course", 999)
         
         assert link is None
-
-
-if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file